@@ -16,6 +16,7 @@ from airlock.db import get_db
 from airlock.models import (
     AdminCreateCredentialRequest,
     AdminCredentialInfo,
+    AdminCredentialListResponse,
     AdminUpdateCredentialRequest,
     CreateProfileRequest,
     CredentialRefResponse,
@@ -104,29 +105,41 @@ async def admin_login(request: LoginRequest) -> TokenResponse:
 # --- Authenticated routes ---
 
 
-@router.get("/credentials", dependencies=[Depends(require_admin)])
-async def admin_list_credentials() -> dict:
+def _admin_credential_info(cred: dict) -> AdminCredentialInfo:
+    """Convert a service-layer credential dict to the admin response model."""
+    return AdminCredentialInfo(
+        id=cred["id"],
+        name=cred["name"],
+        description=cred["description"],
+        has_value=cred["value_exists"],
+        created_at=cred["created_at"],
+        updated_at=cred["updated_at"],
+    )
+
+
+@router.get(
+    "/credentials",
+    response_model=AdminCredentialListResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def admin_list_credentials() -> AdminCredentialListResponse:
     """List all stored credentials with metadata. Never returns values."""
     db = await get_db()
     creds = await list_credentials(db)
-    return {
-        "credentials": [
-            AdminCredentialInfo(
-                name=c["name"],
-                description=c["description"],
-                has_value=c["value_exists"],
-                created_at=c["created_at"],
-                updated_at=c["updated_at"],
-            ).model_dump()
-            for c in creds
-        ]
-    }
+    return AdminCredentialListResponse(
+        credentials=[_admin_credential_info(c) for c in creds]
+    )
 
 
-@router.post("/credentials", status_code=201, dependencies=[Depends(require_admin)])
+@router.post(
+    "/credentials",
+    status_code=201,
+    response_model=AdminCredentialInfo,
+    dependencies=[Depends(require_admin)],
+)
 async def admin_create_credential(
     body: AdminCreateCredentialRequest, request: Request
-) -> dict:
+) -> AdminCredentialInfo:
     """Create a credential with optional value."""
     try:
         validate_credential_name(body.name)
@@ -141,19 +154,17 @@ async def admin_create_credential(
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
 
-    return AdminCredentialInfo(
-        name=cred["name"],
-        description=cred["description"],
-        has_value=cred["value_exists"],
-        created_at=cred["created_at"],
-        updated_at=cred["updated_at"],
-    ).model_dump()
+    return _admin_credential_info(cred)
 
 
-@router.put("/credentials/{name}", dependencies=[Depends(require_admin)])
+@router.put(
+    "/credentials/{name}",
+    response_model=AdminCredentialInfo,
+    dependencies=[Depends(require_admin)],
+)
 async def admin_update_credential(
     name: str, body: AdminUpdateCredentialRequest, request: Request
-) -> dict:
+) -> AdminCredentialInfo:
     """Update a credential's value and/or description."""
     master_key: bytes = request.app.state.master_key
     db = await get_db()
@@ -170,13 +181,7 @@ async def admin_update_credential(
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
-    return AdminCredentialInfo(
-        name=cred["name"],
-        description=cred["description"],
-        has_value=cred["value_exists"],
-        created_at=cred["created_at"],
-        updated_at=cred["updated_at"],
-    ).model_dump()
+    return _admin_credential_info(cred)
 
 
 @router.delete("/credentials/{name}", status_code=204, dependencies=[Depends(require_admin)])
@@ -15,6 +15,7 @@ from airlock.models import (
     AgentCreateCredentialsRequest,
     AgentCreateCredentialsResponse,
     AgentCredentialInfo,
+    AgentCredentialListResponse,
     CreateProfileRequest,
     CredentialRefResponse,
     ExecutionCreated,
@@ -108,21 +109,21 @@ async def _dispatch_to_worker(
 # --- Credential endpoints ---
 
 
-@router.get("/credentials")
-async def agent_list_credentials() -> dict:
+@router.get("/credentials", response_model=AgentCredentialListResponse)
+async def agent_list_credentials() -> AgentCredentialListResponse:
     """List all credentials with metadata. Never returns values."""
     db = await get_db()
     creds = await list_credentials(db)
-    return {
-        "credentials": [
+    return AgentCredentialListResponse(
+        credentials=[
             AgentCredentialInfo(
                 name=c["name"],
                 description=c["description"],
                 value_exists=c["value_exists"],
-            ).model_dump()
+            )
             for c in creds
         ]
-    }
+    )
 
 
 @router.post("/credentials", status_code=201, response_model=AgentCreateCredentialsResponse)
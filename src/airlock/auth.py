@@ -26,6 +26,11 @@ def _hash(value: str) -> str:
     return hashlib.sha256(value.encode()).hexdigest()
 
 
+def _now() -> datetime:
+    """Current UTC time (patched in tests to move the clock)."""
+    return datetime.now(timezone.utc)
+
+
 def _generate_token() -> str:
     """Generate a session token with atk_ prefix."""
     random_part = "".join(secrets.choice(TOKEN_CHARS) for _ in range(TOKEN_LENGTH))
@@ -153,7 +158,7 @@ async def require_profile(
 
     if profile["expires_at"]:
         expires = datetime.fromisoformat(profile["expires_at"])
-        if expires <= datetime.now(timezone.utc):
+        if expires <= _now():
             raise HTTPException(status_code=401, detail="Profile has expired")
 
     master_key = request.app.state.master_key
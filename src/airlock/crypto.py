@@ -1,6 +1,9 @@
 """Credential encryption using AES-256-GCM with an instance-derived key."""
 
+import functools
+import hmac
 import os
+from collections.abc import Iterable
 from pathlib import Path
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
@@ -8,6 +11,12 @@ from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 _NONCE_SIZE = 12  # 96 bits, recommended for AES-GCM
 
 
+@functools.lru_cache(maxsize=4)  # one master key per process; a few more in tests
+def _cipher(master_key: bytes) -> AESGCM:
+    """Return the AESGCM instance for a key, expanding its key schedule only once."""
+    return AESGCM(master_key)
+
+
 def get_or_create_master_key(data_dir: Path) -> bytes:
     """Load master key from .secret file, or generate and save one.
 
@@ -26,18 +35,36 @@ def get_or_create_master_key(data_dir: Path) -> bytes:
 def encrypt_value(plaintext: str, master_key: bytes) -> bytes:
     """Encrypt a credential value. Returns nonce + ciphertext + tag as a single blob."""
     nonce = os.urandom(_NONCE_SIZE)
-    aesgcm = AESGCM(master_key)
-    ciphertext = aesgcm.encrypt(nonce, plaintext.encode("utf-8"), None)
+    ciphertext = _cipher(master_key).encrypt(nonce, plaintext.encode("utf-8"), None)
     return nonce + ciphertext
 
 
-def decrypt_value(encrypted: bytes, master_key: bytes) -> str:
+def decrypt_value(encrypted: bytes | bytearray | memoryview, master_key: bytes) -> str:
     """Decrypt a credential value blob back to plaintext string.
 
+    Accepts any bytes-like blob; it is sliced through a memoryview, not copied.
     Raises cryptography.exceptions.InvalidTag on tampered or invalid data.
     """
-    nonce = encrypted[:_NONCE_SIZE]
-    ciphertext = encrypted[_NONCE_SIZE:]
-    aesgcm = AESGCM(master_key)
-    plaintext = aesgcm.decrypt(nonce, ciphertext, None)
+    view = memoryview(encrypted)
+    nonce = view[:_NONCE_SIZE]
+    ciphertext = view[_NONCE_SIZE:]
+    plaintext = _cipher(master_key).decrypt(nonce, ciphertext, None)
     return plaintext.decode("utf-8")
+
+
+def decrypt_many(encrypted: Iterable[bytes], master_key: bytes) -> list[str]:
+    """Decrypt several credential value blobs with a single cipher instance.
+
+    Same result as calling decrypt_value on each blob.
+    Raises InvalidTag on the first tampered or invalid blob.
+    """
+    aesgcm = _cipher(master_key)
+    return [
+        aesgcm.decrypt(blob[:_NONCE_SIZE], blob[_NONCE_SIZE:], None).decode("utf-8")
+        for blob in encrypted
+    ]
+
+
+def sha256_hmac_hex(key: bytes, message: bytes) -> str:
+    """Return the HMAC-SHA256 hex digest of message under key (one-shot OpenSSL HMAC)."""
+    return hmac.digest(key, message, "sha256").hex()
@@ -6,7 +6,11 @@ from pathlib import Path
 import aiosqlite
 
 DATA_DIR = Path(os.environ.get("AIRLOCK_DATA_DIR", "./data"))
-DB_PATH = DATA_DIR / "airlock.db"
+DB_PATH: Path | str = DATA_DIR / "airlock.db"  # ":memory:" keeps the database in-process
+
+# With WAL, NORMAL only fsyncs at checkpoints; set FULL to fsync every commit.
+DB_SYNCHRONOUS = os.environ.get("AIRLOCK_DB_SYNCHRONOUS", "NORMAL").upper()
+_SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
 
 _db: aiosqlite.Connection | None = None
 
@@ -80,10 +84,16 @@ CREATE TABLE IF NOT EXISTS admin (
 async def init_db() -> aiosqlite.Connection:
     """Initialize the database: create data dir, open connection, create tables."""
     global _db
+    if DB_SYNCHRONOUS not in _SYNCHRONOUS_MODES:
+        raise ValueError(
+            f"AIRLOCK_DB_SYNCHRONOUS must be one of {', '.join(_SYNCHRONOUS_MODES)}"
+        )
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     _db = await aiosqlite.connect(str(DB_PATH))
     _db.row_factory = aiosqlite.Row
     await _db.execute("PRAGMA journal_mode=WAL")
+    await _db.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+    await _db.execute("PRAGMA temp_store=MEMORY")
     await _db.execute("PRAGMA foreign_keys=ON")
     await _db.executescript(SCHEMA)
     await _db.commit()
@@ -143,6 +143,7 @@ class AgentCreateCredentialsRequest(BaseModel):
 class AdminCredentialInfo(BaseModel):
     """Credential metadata for admin API."""
 
+    id: str
     name: str
     description: str
     has_value: bool
@@ -158,6 +159,18 @@ class AgentCredentialInfo(BaseModel):
     value_exists: bool
 
 
+class AdminCredentialListResponse(BaseModel):
+    """All credentials, as listed by the admin API."""
+
+    credentials: list[AdminCredentialInfo]
+
+
+class AgentCredentialListResponse(BaseModel):
+    """All credentials, as listed by the agent API."""
+
+    credentials: list[AgentCredentialInfo]
+
+
 class AgentCreateCredentialsResponse(BaseModel):
     """Result of agent batch credential creation."""
 
@@ -6,15 +6,16 @@ from typing import TypedDict
 
 import aiosqlite
 
-from airlock.crypto import decrypt_value, encrypt_value
+from airlock.crypto import decrypt_many, decrypt_value, encrypt_value
 
-_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_NAME_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*", re.ASCII)
 _NAME_MAX_LENGTH = 128
 
 
 class CredentialInfo(TypedDict):
     """Credential metadata returned by list/get operations."""
 
+    id: str
     name: str
     description: str
     value_exists: bool
@@ -22,6 +23,18 @@ class CredentialInfo(TypedDict):
     updated_at: str | None
 
 
+def _credential_info(row: aiosqlite.Row) -> CredentialInfo:
+    """Build credential metadata from a credentials row."""
+    return CredentialInfo(
+        id=row["id"],
+        name=row["name"],
+        description=row["description"],
+        value_exists=row["encrypted_value"] is not None,
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+    )
+
+
 def validate_credential_name(name: str) -> None:
     """Validate a credential name against naming rules.
 
@@ -31,7 +44,7 @@ def validate_credential_name(name: str) -> None:
         raise ValueError("Credential name cannot be empty")
     if len(name) > _NAME_MAX_LENGTH:
         raise ValueError(f"Credential name exceeds {_NAME_MAX_LENGTH} characters")
-    if not _NAME_PATTERN.match(name):
+    if not _NAME_PATTERN.fullmatch(name):
         raise ValueError(
             f"Invalid credential name '{name}': must match [A-Za-z_][A-Za-z0-9_]*"
         )
@@ -40,39 +53,24 @@ def validate_credential_name(name: str) -> None:
 async def list_credentials(db: aiosqlite.Connection) -> list[CredentialInfo]:
     """List all credentials with metadata. Never returns values."""
     cursor = await db.execute(
-        "SELECT name, description, encrypted_value, created_at, updated_at "
+        "SELECT id, name, description, encrypted_value, created_at, updated_at "
         "FROM credentials ORDER BY name"
     )
     rows = await cursor.fetchall()
-    return [
-        CredentialInfo(
-            name=row["name"],
-            description=row["description"],
-            value_exists=row["encrypted_value"] is not None,
-            created_at=row["created_at"],
-            updated_at=row["updated_at"],
-        )
-        for row in rows
-    ]
+    return [_credential_info(row) for row in rows]
 
 
 async def get_credential(db: aiosqlite.Connection, name: str) -> CredentialInfo | None:
     """Get a single credential's metadata by name."""
     cursor = await db.execute(
-        "SELECT name, description, encrypted_value, created_at, updated_at "
+        "SELECT id, name, description, encrypted_value, created_at, updated_at "
         "FROM credentials WHERE name = ?",
         (name,),
     )
     row = await cursor.fetchone()
     if row is None:
         return None
-    return CredentialInfo(
-        name=row["name"],
-        description=row["description"],
-        value_exists=row["encrypted_value"] is not None,
-        created_at=row["created_at"],
-        updated_at=row["updated_at"],
-    )
+    return _credential_info(row)
 
 
 # Sentinel for "not provided" (distinct from None which means "clear the value")
@@ -99,14 +97,16 @@ async def create_credential(
     credential_id = f"cred_{uuid.uuid4().hex}"
     encrypted = encrypt_value(value, master_key) if value is not None else None
 
-    await db.execute(
+    cursor = await db.execute(
         "INSERT INTO credentials (id, name, encrypted_value, description) "
-        "VALUES (?, ?, ?, ?)",
+        "VALUES (?, ?, ?, ?) "
+        "RETURNING id, name, description, encrypted_value, created_at, updated_at",
         (credential_id, name, encrypted, description),
     )
+    row = await cursor.fetchone()
     await db.commit()
 
-    return (await get_credential(db, name))  # type: ignore[return-value]
+    return _credential_info(row)  # type: ignore[arg-type]
 
 
 async def update_credential(
@@ -238,13 +238,10 @@ async def resolve_profile_credentials(
         "SELECT c.name, c.encrypted_value "
         "FROM credentials c "
         "JOIN profile_credentials pc ON c.id = pc.credential_id "
-        "WHERE pc.profile_id = ?",
+        "WHERE pc.profile_id = ? AND c.encrypted_value IS NOT NULL",
         (profile_id,),
     )
     rows = await cursor.fetchall()
 
-    result: dict[str, str] = {}
-    for row in rows:
-        if row["encrypted_value"] is not None:
-            result[row["name"]] = decrypt_value(row["encrypted_value"], master_key)
-    return result
+    values = decrypt_many((row["encrypted_value"] for row in rows), master_key)
+    return dict(zip((row["name"] for row in rows), values, strict=True))
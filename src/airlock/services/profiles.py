@@ -1,6 +1,5 @@
 """Profile management: CRUD, locking, key generation, credential binding."""
 
-import hashlib
 import hmac as hmac_mod
 import secrets
 import string
@@ -9,7 +8,7 @@ from typing import TypedDict
 
 import aiosqlite
 
-from airlock.crypto import decrypt_value, encrypt_value
+from airlock.crypto import encrypt_value, sha256_hmac_hex
 
 KEY_ID_PREFIX = "ark_"
 KEY_ID_CHARS = string.ascii_lowercase + string.digits
@@ -60,12 +59,8 @@ def _generate_secret() -> str:
 
 def verify_script_hmac(secret: str, script: str, provided_hash: str) -> bool:
     """Verify HMAC-SHA256(secret, script) matches the provided hash."""
-    expected = hmac_mod.new(
-        secret.encode("utf-8"),
-        script.encode("utf-8"),
-        hashlib.sha256,
-    ).hexdigest()
-    return hmac_mod.compare_digest(expected, provided_hash)
+    expected = sha256_hmac_hex(secret.encode("utf-8"), script.encode("utf-8"))
+    return hmac_mod.compare_digest(expected.encode("ascii"), provided_hash.encode("utf-8"))
 
 
 async def _get_profile_credentials(
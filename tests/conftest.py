@@ -2,6 +2,9 @@
 
 import os
 import tempfile
+from collections.abc import Mapping
+from types import MappingProxyType
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from httpx import ASGITransport, AsyncClient
@@ -12,46 +15,129 @@ os.environ["AIRLOCK_DATA_DIR"] = _tmpdir
 os.environ["AIRLOCK_WORKER_ENABLED"] = "false"
 
 
-@pytest.fixture(autouse=True)
-def _reset_db_module():
-    """Reset the db module state between tests."""
-    from airlock import db
-    db._db = None
+# Child tables first so foreign keys never block the reset. The admin table is
+# kept so the session-wide admin_token stays valid; see fresh_admin.
+_TABLES = ("profile_credentials", "executions", "credentials", "profiles")
 
 
-@pytest.fixture
-async def app(tmp_path):
-    """Create a fresh app instance with a clean temp database."""
+@pytest.fixture(scope="session")
+async def app(tmp_path_factory):
+    """One app instance and in-memory database shared by the whole session."""
     import airlock.db as db_module
 
-    os.environ["AIRLOCK_DATA_DIR"] = str(tmp_path)
-    db_module.DATA_DIR = tmp_path
-    db_module.DB_PATH = tmp_path / "airlock.db"
+    data_dir = tmp_path_factory.mktemp("data")
+    os.environ["AIRLOCK_DATA_DIR"] = str(data_dir)
+    db_module.DATA_DIR = data_dir
+    db_module.DB_PATH = ":memory:"
     db_module._db = None
 
     from airlock.app import create_app
     application = create_app()
 
+    # Route dependencies are resolved at registration; build the cached schema up front too.
+    application.openapi()
+
     async with application.router.lifespan_context(application):
         yield application
 
     db_module._db = None
 
 
+@pytest.fixture(autouse=True)
+async def _reset_app(app):
+    """Empty every table and detach any worker after each test."""
+    yield
+    from airlock.db import get_db
+
+    db = await get_db()
+    for table in _TABLES:
+        await db.execute(f"DELETE FROM {table}")
+    await db.commit()
+    app.state.worker_manager = None
+
+
 @pytest.fixture
+async def db(app):
+    """The app's database connection."""
+    from airlock.db import get_db
+
+    return await get_db()
+
+
+@pytest.fixture(scope="session")
 async def client(app):
-    """HTTP client for testing."""
+    """HTTP client for testing, shared by the whole session."""
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as c:
         yield c
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 async def admin_token(client) -> str:
-    """Set up admin and return a valid session token."""
+    """Set up admin once for the session and return a valid session token."""
     resp = await client.post(
         "/api/admin/setup",
         json={"password": "testpassword123"},
     )
     assert resp.status_code == 200
     return resp.json()["token"]
+
+
+@pytest.fixture(scope="session")
+def admin_headers(admin_token) -> Mapping[bytes, bytes]:
+    """Authorization header for admin_token: encoded once, read-only, shared by the session."""
+    return MappingProxyType({b"Authorization": f"Bearer {admin_token}".encode("ascii")})
+
+
+@pytest.fixture
+async def locked_profile(app, db) -> tuple[str, str, str]:
+    """A locked profile as (profile_id, key_id, secret), seeded via the service layer."""
+    from airlock.services.profiles import create_profile, lock_profile
+
+    profile = await create_profile(db, "test profile")
+    locked = await lock_profile(db, profile["id"], app.state.master_key)
+    key_id, _, secret = locked["key"].partition(":")
+    return profile["id"], key_id, secret
+
+
+@pytest.fixture(scope="session")
+def _session_mock_worker() -> MagicMock:
+    """One mock WorkerManager built once and reused by every test."""
+    mock = MagicMock()
+    mock.execute = AsyncMock()
+    return mock
+
+
+@pytest.fixture
+def mock_worker(_session_mock_worker) -> MagicMock:
+    """The shared mock WorkerManager, reset to a running worker that completes."""
+    mock = _session_mock_worker
+    mock.reset_mock()
+    mock.is_running.return_value = True
+    mock.execute.side_effect = None
+    mock.execute.return_value = {
+        "status": "completed",
+        "result": {"answer": 42},
+        "stdout": "hello\n",
+        "stderr": "",
+    }
+    return mock
+
+
+@pytest.fixture
+async def fresh_admin(app):
+    """Run a test against an instance with no admin configured.
+
+    The session's admin rows are restored afterwards, so admin_token keeps working.
+    """
+    from airlock.db import get_db
+
+    db = await get_db()
+    cursor = await db.execute("SELECT key, value FROM admin")
+    saved = [tuple(row) for row in await cursor.fetchall()]
+    await db.execute("DELETE FROM admin")
+    await db.commit()
+    yield
+    await db.execute("DELETE FROM admin")
+    await db.executemany("INSERT INTO admin (key, value) VALUES (?, ?)", saved)
+    await db.commit()
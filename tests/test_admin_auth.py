@@ -1,6 +1,9 @@
 """Tests for admin setup, login, and authenticated routes."""
 
+import pytest
 
+
+@pytest.mark.usefixtures("fresh_admin")
 async def test_status_setup_required(client):
     """Fresh instance should require setup."""
     resp = await client.get("/api/admin/status")
@@ -8,6 +11,7 @@ async def test_status_setup_required(client):
     assert resp.json()["setup_required"] is True
 
 
+@pytest.mark.usefixtures("fresh_admin")
 async def test_setup_creates_admin(client):
     """First setup call should succeed and return a token."""
     resp = await client.post(
@@ -19,6 +23,7 @@ async def test_setup_creates_admin(client):
     assert data["token"].startswith("atk_")
 
 
+@pytest.mark.usefixtures("fresh_admin")
 async def test_setup_only_once(client):
     """Second setup call should fail with 409."""
     await client.post("/api/admin/setup", json={"password": "mypassword123"})
@@ -26,6 +31,7 @@ async def test_setup_only_once(client):
     assert resp.status_code == 409
 
 
+@pytest.mark.usefixtures("fresh_admin")
 async def test_setup_short_password(client):
     """Password under 8 chars should be rejected."""
     resp = await client.post("/api/admin/setup", json={"password": "short"})
@@ -39,6 +45,7 @@ async def test_status_after_setup(client, admin_token):
     assert resp.json()["setup_required"] is False
 
 
+@pytest.mark.usefixtures("fresh_admin")
 async def test_login_valid_password(client):
     """Login with correct password returns a token."""
     await client.post("/api/admin/setup", json={"password": "mypassword123"})
@@ -47,6 +54,7 @@ async def test_login_valid_password(client):
     assert resp.json()["token"].startswith("atk_")
 
 
+@pytest.mark.usefixtures("fresh_admin")
 async def test_login_wrong_password(client):
     """Login with wrong password returns 401."""
     await client.post("/api/admin/setup", json={"password": "mypassword123"})
@@ -1,54 +1,18 @@
 """Tests for the agent-facing API endpoints."""
 
-import hashlib
 import hmac as hmac_mod
-from unittest.mock import AsyncMock, MagicMock
+
+from airlock.api.agent import _dispatch_to_worker
 
 
 def _compute_hmac(secret: str, script: str) -> str:
     """Compute HMAC-SHA256 hex digest for a script."""
-    return hmac_mod.new(
-        secret.encode("utf-8"),
-        script.encode("utf-8"),
-        hashlib.sha256,
-    ).hexdigest()
-
-
-async def _create_and_lock_profile(client, admin_token):
-    """Helper: create a profile, lock it, return (key_id, secret)."""
-    resp = await client.post(
-        "/api/admin/profiles",
-        json={"description": "test profile"},
-        headers={"Authorization": f"Bearer {admin_token}"},
-    )
-    profile_id = resp.json()["id"]
+    return hmac_mod.digest(secret.encode("utf-8"), script.encode("utf-8"), "sha256").hex()
 
-    resp = await client.post(
-        f"/api/admin/profiles/{profile_id}/lock",
-        headers={"Authorization": f"Bearer {admin_token}"},
-    )
-    data = resp.json()
-    full_key = data["key"]
-    key_id, secret = full_key.split(":", 1)
-    return key_id, secret
-
-
-def _mock_worker_manager():
-    """Create a mock WorkerManager that returns completed status."""
-    mock = MagicMock()
-    mock.is_running.return_value = True
-    mock.execute = AsyncMock(return_value={
-        "status": "completed",
-        "result": {"echo": "hello"},
-        "stdout": "",
-        "stderr": "",
-    })
-    return mock
-
-
-async def test_execute_valid_profile(app, client, admin_token):
-    app.state.worker_manager = _mock_worker_manager()
-    key_id, secret = await _create_and_lock_profile(client, admin_token)
+
+async def test_execute_valid_profile(app, client, locked_profile, mock_worker):
+    _, key_id, secret = locked_profile
+    app.state.worker_manager = mock_worker
     script = "print('hello')"
     script_hash = _compute_hmac(secret, script)
 
@@ -80,10 +44,9 @@ async def test_execute_missing_auth(client):
     assert response.status_code == 401
 
 
-async def test_poll_execution(app, client, admin_token):
-    mock_worker = _mock_worker_manager()
+async def test_poll_execution(app, client, db, locked_profile, mock_worker):
+    _, key_id, secret = locked_profile
     app.state.worker_manager = mock_worker
-    key_id, secret = await _create_and_lock_profile(client, admin_token)
     script = "print('hello')"
     script_hash = _compute_hmac(secret, script)
 
@@ -96,9 +59,6 @@ async def test_poll_execution(app, client, admin_token):
     execution_id = create_resp.json()["execution_id"]
 
     # Manually run background dispatch
-    from airlock.db import get_db
-    from airlock.api.agent import _dispatch_to_worker
-    db = await get_db()
     await _dispatch_to_worker(db, mock_worker, execution_id, script, {}, 60)
 
     # Poll it
@@ -106,7 +66,7 @@ async def test_poll_execution(app, client, admin_token):
     assert poll_resp.status_code == 200
     data = poll_resp.json()
     assert data["status"] == "completed"
-    assert data["result"] == {"echo": "hello"}
+    assert data["result"] == {"answer": 42}
 
 
 async def test_poll_missing_execution(client):
@@ -114,10 +74,9 @@ async def test_poll_missing_execution(client):
     assert response.status_code == 404
 
 
-async def test_respond_to_completed_execution(app, client, admin_token):
-    mock_worker = _mock_worker_manager()
+async def test_respond_to_completed_execution(app, client, db, locked_profile, mock_worker):
+    _, key_id, secret = locked_profile
     app.state.worker_manager = mock_worker
-    key_id, secret = await _create_and_lock_profile(client, admin_token)
     script = "print('hello')"
     script_hash = _compute_hmac(secret, script)
 
@@ -130,9 +89,6 @@ async def test_respond_to_completed_execution(app, client, admin_token):
     execution_id = create_resp.json()["execution_id"]
 
     # Run the worker to set status to completed
-    from airlock.db import get_db
-    from airlock.api.agent import _dispatch_to_worker
-    db = await get_db()
     await _dispatch_to_worker(db, mock_worker, execution_id, script, {}, 60)
 
     # Try to respond — should fail because status is 'completed', not 'awaiting_llm'
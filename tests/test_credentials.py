@@ -1,63 +1,74 @@
 """Tests for credential management: encryption, admin CRUD, agent API, service layer."""
 
+import asyncio
 import os
 
 import pytest
+from cryptography.exceptions import InvalidTag
+
+from airlock.crypto import (
+    _cipher,
+    decrypt_many,
+    decrypt_value,
+    encrypt_value,
+    get_or_create_master_key,
+)
+from airlock.db import get_db
+from airlock.services.credentials import resolve_profile_credentials
 
 
 # --- Encryption ---
 
 
+@pytest.fixture(scope="module")
+def aes_key() -> bytes:
+    """One AES-256 key shared by the encryption round-trip tests."""
+    return os.urandom(32)
+
+
 class TestEncryption:
     """AES-256-GCM encryption round-trip and error handling."""
 
-    def test_encrypt_decrypt_roundtrip(self):
+    def test_encrypt_decrypt_roundtrip(self, aes_key):
         """Encrypt a value then decrypt it — matches original."""
-        from airlock.crypto import decrypt_value, encrypt_value
-
-        key = os.urandom(32)
         plaintext = "sk-live-abc123"
-        encrypted = encrypt_value(plaintext, key)
-        result = decrypt_value(encrypted, key)
+        encrypted = encrypt_value(plaintext, aes_key)
+        result = decrypt_value(encrypted, aes_key)
         assert result == plaintext
 
-    def test_encrypt_same_value_different_ciphertext(self):
+    def test_encrypt_same_value_different_ciphertext(self, aes_key):
         """Encrypting the same value twice produces different ciphertexts (random nonce)."""
-        from airlock.crypto import encrypt_value
-
-        key = os.urandom(32)
-        a = encrypt_value("secret", key)
-        b = encrypt_value("secret", key)
+        a = encrypt_value("secret", aes_key)
+        b = encrypt_value("secret", aes_key)
         assert a != b
 
-    def test_decrypt_wrong_key_raises(self):
-        """Decrypt with wrong key raises an error."""
-        from cryptography.exceptions import InvalidTag
+    def test_cipher_reused_per_key(self, aes_key):
+        """The AESGCM instance is built once per key and reused."""
+        assert _cipher(aes_key) is _cipher(aes_key)
+        assert _cipher(aes_key) is not _cipher(os.urandom(32))
 
-        from airlock.crypto import decrypt_value, encrypt_value
+    def test_decrypt_many_roundtrip(self, aes_key):
+        """decrypt_many returns the plaintexts in input order."""
+        plaintexts = ["sk-live-abc123", "db-password", ""]
+        encrypted = [encrypt_value(p, aes_key) for p in plaintexts]
+        assert decrypt_many(encrypted, aes_key) == plaintexts
 
-        key1 = os.urandom(32)
-        key2 = os.urandom(32)
-        encrypted = encrypt_value("secret", key1)
+    def test_decrypt_wrong_key_raises(self, aes_key):
+        """Decrypt with wrong key raises an error."""
+        other_key = os.urandom(32)
+        encrypted = encrypt_value("secret", aes_key)
         with pytest.raises(InvalidTag):
-            decrypt_value(encrypted, key2)
+            decrypt_value(encrypted, other_key)
 
-    def test_decrypt_tampered_data_raises(self):
+    def test_decrypt_tampered_data_raises(self, aes_key):
         """Decrypt tampered data raises an error."""
-        from cryptography.exceptions import InvalidTag
-
-        from airlock.crypto import decrypt_value, encrypt_value
-
-        key = os.urandom(32)
-        encrypted = bytearray(encrypt_value("secret", key))
+        encrypted = bytearray(encrypt_value("secret", aes_key))
         encrypted[-1] ^= 0xFF  # Flip last byte
         with pytest.raises(InvalidTag):
-            decrypt_value(bytes(encrypted), key)
+            decrypt_value(encrypted, aes_key)
 
     def test_master_key_creation(self, tmp_path):
         """Master key is created on first call and reused on second."""
-        from airlock.crypto import get_or_create_master_key
-
         key1 = get_or_create_master_key(tmp_path)
         key2 = get_or_create_master_key(tmp_path)
         assert key1 == key2
@@ -65,34 +76,24 @@ class TestEncryption:
 
     def test_master_key_file_permissions(self, tmp_path):
         """Master key file has 0o600 permissions."""
-        from airlock.crypto import get_or_create_master_key
-
         get_or_create_master_key(tmp_path)
         secret_path = tmp_path / ".secret"
         mode = secret_path.stat().st_mode & 0o777
         assert mode == 0o600
 
 
-# --- Helpers ---
-
-
-def _auth(token: str) -> dict:
-    """Build authorization header."""
-    return {"Authorization": f"Bearer {token}"}
-
-
 # --- Admin API: Credential CRUD ---
 
 
 class TestAdminCredentialCRUD:
     """Admin credential endpoints require auth and perform full CRUD."""
 
-    async def test_create_credential_with_value(self, client, admin_token):
+    async def test_create_credential_with_value(self, client, admin_headers):
         """POST /api/admin/credentials with value → 201, has_value: true."""
         resp = await client.post(
             "/api/admin/credentials",
             json={"name": "API_KEY", "value": "sk-live-123", "description": "Test key"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
         assert resp.status_code == 201
         data = resp.json()
@@ -100,71 +101,83 @@ class TestAdminCredentialCRUD:
         assert data["description"] == "Test key"
         assert data["has_value"] is True
         assert "created_at" in data
+        assert data["id"].startswith("cred_")
 
-    async def test_create_credential_without_value(self, client, admin_token):
+    async def test_create_credential_without_value(self, client, admin_headers):
         """POST /api/admin/credentials without value → 201, has_value: false."""
         resp = await client.post(
             "/api/admin/credentials",
             json={"name": "EMPTY_SLOT", "description": "No value yet"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
         assert resp.status_code == 201
         assert resp.json()["has_value"] is False
 
-    async def test_create_credential_duplicate_name(self, client, admin_token):
+    async def test_create_credential_duplicate_name(self, client, admin_headers):
         """POST /api/admin/credentials with same name → 409."""
         await client.post(
             "/api/admin/credentials",
             json={"name": "DUP_KEY"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
         resp = await client.post(
             "/api/admin/credentials",
             json={"name": "DUP_KEY"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
         assert resp.status_code == 409
 
-    async def test_create_credential_invalid_name_starts_with_digit(self, client, admin_token):
+    async def test_create_credential_invalid_name_starts_with_digit(self, client, admin_headers):
         """POST /api/admin/credentials with name starting with digit → 422."""
         resp = await client.post(
             "/api/admin/credentials",
             json={"name": "123bad"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
         assert resp.status_code == 422
 
-    async def test_create_credential_invalid_name_has_spaces(self, client, admin_token):
+    async def test_create_credential_invalid_name_has_spaces(self, client, admin_headers):
         """POST /api/admin/credentials with spaces in name → 422."""
         resp = await client.post(
             "/api/admin/credentials",
             json={"name": "has spaces"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
+        )
+        assert resp.status_code == 422
+
+    async def test_create_credential_invalid_name_trailing_newline(self, client, admin_headers):
+        """POST /api/admin/credentials with a trailing newline in name → 422."""
+        resp = await client.post(
+            "/api/admin/credentials",
+            json={"name": "BAD_NAME\n"},
+            headers=admin_headers,
         )
         assert resp.status_code == 422
 
-    async def test_create_credential_empty_name(self, client, admin_token):
+    async def test_create_credential_empty_name(self, client, admin_headers):
         """POST /api/admin/credentials with empty name → 422."""
         resp = await client.post(
             "/api/admin/credentials",
             json={"name": ""},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
         assert resp.status_code == 422
 
-    async def test_list_credentials(self, client, admin_token):
+    async def test_list_credentials(self, client, admin_headers):
         """GET /api/admin/credentials lists all, never returns values."""
-        await client.post(
-            "/api/admin/credentials",
-            json={"name": "KEY_A", "value": "secret_a", "description": "A"},
-            headers=_auth(admin_token),
-        )
-        await client.post(
-            "/api/admin/credentials",
-            json={"name": "KEY_B", "description": "B"},
-            headers=_auth(admin_token),
-        )
-        resp = await client.get("/api/admin/credentials", headers=_auth(admin_token))
+        await asyncio.gather(
+            client.post(
+                "/api/admin/credentials",
+                json={"name": "KEY_A", "value": "secret_a", "description": "A"},
+                headers=admin_headers,
+            ),
+            client.post(
+                "/api/admin/credentials",
+                json={"name": "KEY_B", "description": "B"},
+                headers=admin_headers,
+            ),
+        )
+        resp = await client.get("/api/admin/credentials", headers=admin_headers)
         assert resp.status_code == 200
         creds = resp.json()["credentials"]
         assert len(creds) == 2
@@ -175,93 +188,83 @@ class TestAdminCredentialCRUD:
             assert "value" not in c
             assert "encrypted_value" not in c
 
-    async def test_update_credential_value(self, client, admin_token):
+    async def test_update_credential_value(self, client, admin_headers):
         """PUT /api/admin/credentials/{name} with value → has_value: true, updated_at set."""
         await client.post(
             "/api/admin/credentials",
             json={"name": "UPD_KEY"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
         resp = await client.put(
             "/api/admin/credentials/UPD_KEY",
             json={"value": "new-secret"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
         assert resp.status_code == 200
         data = resp.json()
         assert data["has_value"] is True
         assert data["updated_at"] is not None
 
-    async def test_update_credential_description_only(self, client, admin_token):
+    async def test_update_credential_description_only(self, client, admin_headers):
         """PUT with description only → description updated, value unchanged."""
         await client.post(
             "/api/admin/credentials",
             json={"name": "DESC_KEY", "value": "original"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
         resp = await client.put(
             "/api/admin/credentials/DESC_KEY",
             json={"description": "Updated desc"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
         assert resp.status_code == 200
         data = resp.json()
         assert data["description"] == "Updated desc"
         assert data["has_value"] is True  # Value unchanged
 
-    async def test_update_nonexistent_credential(self, client, admin_token):
+    async def test_update_nonexistent_credential(self, client, admin_headers):
         """PUT /api/admin/credentials/nonexistent → 404."""
         resp = await client.put(
             "/api/admin/credentials/DOES_NOT_EXIST",
             json={"value": "whatever"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
         assert resp.status_code == 404
 
-    async def test_delete_credential(self, client, admin_token):
+    async def test_delete_credential(self, client, admin_headers):
         """DELETE /api/admin/credentials/{name} → 204."""
         await client.post(
             "/api/admin/credentials",
             json={"name": "DEL_KEY", "value": "gone"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
         resp = await client.delete(
-            "/api/admin/credentials/DEL_KEY", headers=_auth(admin_token)
+            "/api/admin/credentials/DEL_KEY", headers=admin_headers
         )
         assert resp.status_code == 204
 
         # Verify it's gone
-        resp = await client.get("/api/admin/credentials", headers=_auth(admin_token))
+        resp = await client.get("/api/admin/credentials", headers=admin_headers)
         names = [c["name"] for c in resp.json()["credentials"]]
         assert "DEL_KEY" not in names
 
-    async def test_delete_nonexistent_credential(self, client, admin_token):
+    async def test_delete_nonexistent_credential(self, client, admin_headers):
         """DELETE /api/admin/credentials/nonexistent → 404."""
         resp = await client.delete(
-            "/api/admin/credentials/NOPE", headers=_auth(admin_token)
+            "/api/admin/credentials/NOPE", headers=admin_headers
         )
         assert resp.status_code == 404
 
-    async def test_admin_endpoints_require_token(self, client):
+    async def test_admin_endpoints_require_token(self, client, admin_token):
         """All admin credential endpoints without token → 401."""
-        # Setup admin first so we don't get 'not configured' errors
-        await client.post("/api/admin/setup", json={"password": "testpassword123"})
-
-        resp = await client.get("/api/admin/credentials")
-        assert resp.status_code == 401
-
-        resp = await client.post(
-            "/api/admin/credentials", json={"name": "X", "value": "Y"}
-        )
-        assert resp.status_code == 401
-
-        resp = await client.put(
-            "/api/admin/credentials/X", json={"value": "Y"}
+        # admin_token ensures setup is done, so we don't get 'not configured' errors
+        responses = await asyncio.gather(
+            client.get("/api/admin/credentials"),
+            client.post("/api/admin/credentials", json={"name": "X", "value": "Y"}),
+            client.put("/api/admin/credentials/X", json={"value": "Y"}),
+            client.delete("/api/admin/credentials/X"),
         )
-        assert resp.status_code == 401
-
-        resp = await client.delete("/api/admin/credentials/X")
-        assert resp.status_code == 401
+        assert [r.status_code for r in responses] == [401] * 4
 
 
 # --- Agent API: Credential Discovery ---
@@ -276,18 +279,20 @@ class TestAgentCredentialAPI:
         assert resp.status_code == 200
         assert resp.json() == {"credentials": []}
 
-    async def test_list_credentials_with_data(self, client, admin_token):
+    async def test_list_credentials_with_data(self, client, admin_headers):
         """GET /credentials lists all credentials with value_exists."""
         # Create via admin API
-        await client.post(
-            "/api/admin/credentials",
-            json={"name": "WITH_VAL", "value": "secret", "description": "Has value"},
-            headers=_auth(admin_token),
-        )
-        await client.post(
-            "/api/admin/credentials",
-            json={"name": "NO_VAL", "description": "No value"},
-            headers=_auth(admin_token),
+        await asyncio.gather(
+            client.post(
+                "/api/admin/credentials",
+                json={"name": "WITH_VAL", "value": "secret", "description": "Has value"},
+                headers=admin_headers,
+            ),
+            client.post(
+                "/api/admin/credentials",
+                json={"name": "NO_VAL", "description": "No value"},
+                headers=admin_headers,
+            ),
         )
 
         resp = await client.get("/credentials")
@@ -368,34 +373,29 @@ class TestAgentCredentialAPI:
 class TestCredentialDeletionWithProfiles:
     """Deletion behavior when credentials are referenced by profiles."""
 
-    async def test_delete_unreferenced_credential(self, client, admin_token):
+    async def test_delete_unreferenced_credential(self, client, admin_headers):
         """Delete credential not referenced by any profile → succeeds."""
         await client.post(
             "/api/admin/credentials",
             json={"name": "SOLO_KEY", "value": "x"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
         resp = await client.delete(
-            "/api/admin/credentials/SOLO_KEY", headers=_auth(admin_token)
+            "/api/admin/credentials/SOLO_KEY", headers=admin_headers
         )
         assert resp.status_code == 204
 
-    async def test_delete_credential_referenced_by_unlocked_profile(self, client, admin_token):
+    async def test_delete_credential_referenced_by_unlocked_profile(self, client, admin_headers):
         """Delete credential referenced by unlocked profile → succeeds, reference removed."""
-        from airlock.db import get_db
-
         # Create credential
-        await client.post(
+        resp = await client.post(
             "/api/admin/credentials",
             json={"name": "UNREF_KEY", "value": "x"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
+        cred_id = resp.json()["id"]
 
         db = await get_db()
-        # Get credential ID
-        cursor = await db.execute("SELECT id FROM credentials WHERE name = 'UNREF_KEY'")
-        cred_row = await cursor.fetchone()
-        cred_id = cred_row["id"]
 
         # Create an unlocked profile directly in DB
         await db.execute(
@@ -409,7 +409,7 @@ class TestCredentialDeletionWithProfiles:
 
         # Delete should succeed
         resp = await client.delete(
-            "/api/admin/credentials/UNREF_KEY", headers=_auth(admin_token)
+            "/api/admin/credentials/UNREF_KEY", headers=admin_headers
         )
         assert resp.status_code == 204
 
@@ -421,21 +421,17 @@ class TestCredentialDeletionWithProfiles:
         row = await cursor.fetchone()
         assert row["cnt"] == 0
 
-    async def test_delete_credential_referenced_by_locked_profile(self, client, admin_token):
+    async def test_delete_credential_referenced_by_locked_profile(self, client, admin_headers):
         """Delete credential referenced by locked profile → 409 with profile IDs."""
-        from airlock.db import get_db
-
         # Create credential
-        await client.post(
+        resp = await client.post(
             "/api/admin/credentials",
             json={"name": "LOCKED_KEY", "value": "x"},
-            headers=_auth(admin_token),
+            headers=admin_headers,
         )
+        cred_id = resp.json()["id"]
 
         db = await get_db()
-        cursor = await db.execute("SELECT id FROM credentials WHERE name = 'LOCKED_KEY'")
-        cred_row = await cursor.fetchone()
-        cred_id = cred_row["id"]
 
         # Create a locked profile directly in DB
         await db.execute(
@@ -449,7 +445,7 @@ class TestCredentialDeletionWithProfiles:
 
         # Delete should fail
         resp = await client.delete(
-            "/api/admin/credentials/LOCKED_KEY", headers=_auth(admin_token)
+            "/api/admin/credentials/LOCKED_KEY", headers=admin_headers
         )
         assert resp.status_code == 409
         assert "ark_locked1" in resp.json()["detail"]
@@ -461,86 +457,65 @@ class TestCredentialDeletionWithProfiles:
 class TestServiceLayer:
     """Direct tests of the credential service functions."""
 
-    async def test_resolve_profile_credentials(self, client, admin_token):
+    async def test_resolve_profile_credentials(self, client, admin_headers):
         """resolve_profile_credentials returns {name: decrypted_value} dict."""
-        from airlock.db import get_db
-        from airlock.services.credentials import resolve_profile_credentials
-
         db = await get_db()
         master_key: bytes = client._transport.app.state.master_key  # type: ignore[attr-defined]
 
         # Create credentials
-        await client.post(
-            "/api/admin/credentials",
-            json={"name": "RESOLVE_A", "value": "secret_a"},
-            headers=_auth(admin_token),
-        )
-        await client.post(
-            "/api/admin/credentials",
-            json={"name": "RESOLVE_B", "value": "secret_b"},
-            headers=_auth(admin_token),
-        )
-
-        # Get credential IDs
-        cursor = await db.execute(
-            "SELECT id FROM credentials WHERE name = 'RESOLVE_A'"
-        )
-        cred_a_id = (await cursor.fetchone())["id"]
-        cursor = await db.execute(
-            "SELECT id FROM credentials WHERE name = 'RESOLVE_B'"
-        )
-        cred_b_id = (await cursor.fetchone())["id"]
+        resp_a, resp_b = await asyncio.gather(
+            client.post(
+                "/api/admin/credentials",
+                json={"name": "RESOLVE_A", "value": "secret_a"},
+                headers=admin_headers,
+            ),
+            client.post(
+                "/api/admin/credentials",
+                json={"name": "RESOLVE_B", "value": "secret_b"},
+                headers=admin_headers,
+            ),
+        )
+        cred_a_id, cred_b_id = resp_a.json()["id"], resp_b.json()["id"]
 
         # Create locked profile
         await db.execute(
             "INSERT INTO profiles (id, description, locked) VALUES ('ark_resolve', 'test', 1)"
         )
-        await db.execute(
-            "INSERT INTO profile_credentials (profile_id, credential_id) VALUES ('ark_resolve', ?)",
-            (cred_a_id,),
-        )
-        await db.execute(
-            "INSERT INTO profile_credentials (profile_id, credential_id) VALUES ('ark_resolve', ?)",
-            (cred_b_id,),
+        await db.executemany(
+            "INSERT INTO profile_credentials (profile_id, credential_id) VALUES (?, ?)",
+            [("ark_resolve", cred_a_id), ("ark_resolve", cred_b_id)],
         )
         await db.commit()
 
         result = await resolve_profile_credentials(db, "ark_resolve", master_key)
         assert result == {"RESOLVE_A": "secret_a", "RESOLVE_B": "secret_b"}
 
-    async def test_resolve_skips_credentials_without_value(self, client, admin_token):
+    async def test_resolve_skips_credentials_without_value(self, client, admin_headers):
         """resolve_profile_credentials skips credentials with no value set."""
-        from airlock.db import get_db
-        from airlock.services.credentials import resolve_profile_credentials
-
         db = await get_db()
         master_key: bytes = client._transport.app.state.master_key  # type: ignore[attr-defined]
 
         # Create one with value, one without
-        await client.post(
-            "/api/admin/credentials",
-            json={"name": "HAS_VAL", "value": "present"},
-            headers=_auth(admin_token),
-        )
-        await client.post(
-            "/api/admin/credentials",
-            json={"name": "NO_VAL_SLOT"},
-            headers=_auth(admin_token),
-        )
-
-        cursor = await db.execute("SELECT id FROM credentials WHERE name = 'HAS_VAL'")
-        has_val_id = (await cursor.fetchone())["id"]
-        cursor = await db.execute("SELECT id FROM credentials WHERE name = 'NO_VAL_SLOT'")
-        no_val_id = (await cursor.fetchone())["id"]
+        has_val, no_val = await asyncio.gather(
+            client.post(
+                "/api/admin/credentials",
+                json={"name": "HAS_VAL", "value": "present"},
+                headers=admin_headers,
+            ),
+            client.post(
+                "/api/admin/credentials",
+                json={"name": "NO_VAL_SLOT"},
+                headers=admin_headers,
+            ),
+        )
+        has_val_id, no_val_id = has_val.json()["id"], no_val.json()["id"]
 
         await db.execute(
             "INSERT INTO profiles (id, description, locked) VALUES ('ark_skip', 'test', 1)"
         )
-        await db.execute(
-            "INSERT INTO profile_credentials VALUES ('ark_skip', ?)", (has_val_id,)
-        )
-        await db.execute(
-            "INSERT INTO profile_credentials VALUES ('ark_skip', ?)", (no_val_id,)
+        await db.executemany(
+            "INSERT INTO profile_credentials VALUES (?, ?)",
+            [("ark_skip", has_val_id), ("ark_skip", no_val_id)],
         )
         await db.commit()
 
@@ -550,9 +525,6 @@ class TestServiceLayer:
 
     async def test_resolve_nonexistent_profile_raises(self, client):
         """resolve_profile_credentials on non-existent profile → raises ValueError."""
-        from airlock.db import get_db
-        from airlock.services.credentials import resolve_profile_credentials
-
         db = await get_db()
         master_key: bytes = client._transport.app.state.master_key  # type: ignore[attr-defined]
 
@@ -561,9 +533,6 @@ class TestServiceLayer:
 
     async def test_resolve_unlocked_profile_raises(self, client):
         """resolve_profile_credentials on unlocked profile → raises ValueError."""
-        from airlock.db import get_db
-        from airlock.services.credentials import resolve_profile_credentials
-
         db = await get_db()
         master_key: bytes = client._transport.app.state.master_key  # type: ignore[attr-defined]
 
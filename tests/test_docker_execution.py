@@ -1,31 +1,39 @@
 """Integration tests for Docker-based script execution (requires Docker)."""
 
-import hashlib
 import hmac as hmac_mod
 import shutil
+import subprocess
 
 import pytest
-from httpx import ASGITransport, AsyncClient
 
+from airlock.api.agent import _dispatch_to_worker
 from airlock.worker_manager import WorkerManager
 
-pytestmark = pytest.mark.skipif(
-    shutil.which("docker") is None,
-    reason="Docker not available",
-)
 
+def _docker_available() -> bool:
+    """Whether the docker CLI is installed and its daemon answers."""
+    if shutil.which("docker") is None:
+        return False
+    try:
+        probe = subprocess.run(["docker", "info"], capture_output=True, timeout=10, check=False)
+    except subprocess.TimeoutExpired:
+        return False
+    return probe.returncode == 0
 
-def _compute_hmac(secret: str, script: str) -> str:
+
+pytestmark = [
+    pytest.mark.docker,
+    pytest.mark.xdist_group("docker"),  # one xdist worker owns the container
+]
+
+
+def _compute_hmac(secret: bytes, script: str) -> str:
     """Compute HMAC-SHA256 hex digest for a script."""
-    return hmac_mod.new(
-        secret.encode("utf-8"),
-        script.encode("utf-8"),
-        hashlib.sha256,
-    ).hexdigest()
+    return hmac_mod.digest(secret, script.encode("utf-8"), "sha256").hex()
 
 
 async def _create_and_lock_profile(client, admin_token):
-    """Helper: create a profile, lock it, return (key_id, secret)."""
+    """Helper: create a profile, lock it, return (key_id, secret bytes)."""
     resp = await client.post(
         "/api/admin/profiles",
         json={"description": "docker test profile"},
@@ -40,145 +48,78 @@ async def _create_and_lock_profile(client, admin_token):
     data = resp.json()
     full_key = data["key"]
     key_id, secret = full_key.split(":", 1)
-    return key_id, secret
+    return key_id, secret.encode("utf-8")
 
 
-@pytest.fixture(scope="session")
-def event_loop_policy():
-    """Use default event loop policy for session-scoped async fixtures."""
-    import asyncio
-    return asyncio.DefaultEventLoopPolicy()
+async def _run_script(client, db, worker, key_id, secret, script, timeout=60):
+    """Helper: submit a script, dispatch it inline, return the polled execution state."""
+    resp = await client.post(
+        "/execute",
+        json={"script": script, "hash": _compute_hmac(secret, script), "timeout": timeout},
+        headers={"Authorization": f"Bearer {key_id}"},
+    )
+    assert resp.status_code == 202
+    exec_id = resp.json()["execution_id"]
+
+    # Manually dispatch since background tasks don't run in test client
+    await _dispatch_to_worker(db, worker, exec_id, script, {}, timeout)
+
+    result = await client.get(f"/executions/{exec_id}")
+    assert result.status_code == 200
+    return result.json()
 
 
 @pytest.fixture(scope="session")
 async def worker():
-    """Start worker container once for the entire test session."""
+    """Start worker container once for the entire test session.
+
+    Docker is probed here rather than at collection, so the check only runs
+    when a Docker test is actually selected. The skip is cached for the session.
+    """
+    if not _docker_available():
+        pytest.skip("Docker not available")
     wm = WorkerManager()
     await wm.start()
     yield wm
     await wm.stop()
 
 
-@pytest.fixture
-async def docker_client(app, worker):
-    """HTTP client with worker manager on app.state."""
+@pytest.fixture(autouse=True)
+def _attach_worker(app, worker):
+    """Point the shared app at the real worker for each Docker test."""
     app.state.worker_manager = worker
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as c:
-        yield c
 
 
-@pytest.fixture
-async def docker_admin_token(docker_client) -> str:
-    """Set up admin and return a valid session token."""
-    resp = await docker_client.post(
-        "/api/admin/setup",
-        json={"password": "testpassword123"},
-    )
-    assert resp.status_code == 200
-    return resp.json()["token"]
-
-
-async def test_simple_execution(docker_client, docker_admin_token):
+async def test_simple_execution(client, db, worker, admin_token):
     """set_result(2 + 2) should produce result=4."""
-    key_id, secret = await _create_and_lock_profile(docker_client, docker_admin_token)
-    script = "set_result(2 + 2)"
-    script_hash = _compute_hmac(secret, script)
-
-    resp = await docker_client.post(
-        "/execute",
-        json={"script": script, "hash": script_hash},
-        headers={"Authorization": f"Bearer {key_id}"},
-    )
-    assert resp.status_code == 202
-    exec_id = resp.json()["execution_id"]
-
-    # Manually dispatch since background tasks don't run in test client
-    from airlock.db import get_db
-    from airlock.api.agent import _dispatch_to_worker
-    db = await get_db()
-    await _dispatch_to_worker(
-        db, docker_client.app.state.worker_manager, exec_id, script, {}, 60
-    )
-
-    result = await docker_client.get(f"/executions/{exec_id}")
-    assert result.status_code == 200
-    assert result.json()["status"] == "completed"
-    assert result.json()["result"] == 4
+    key_id, secret = await _create_and_lock_profile(client, admin_token)
+    body = await _run_script(client, db, worker, key_id, secret, "set_result(2 + 2)")
+    assert body["status"] == "completed"
+    assert body["result"] == 4
 
 
-async def test_stdout_capture(docker_client, docker_admin_token):
+async def test_stdout_capture(client, db, worker, admin_token):
     """print() output should appear in stdout."""
-    key_id, secret = await _create_and_lock_profile(docker_client, docker_admin_token)
-    script = 'print("hello")'
-    script_hash = _compute_hmac(secret, script)
+    key_id, secret = await _create_and_lock_profile(client, admin_token)
+    body = await _run_script(client, db, worker, key_id, secret, 'print("hello")')
+    assert body["stdout"] == "hello\n"
 
-    resp = await docker_client.post(
-        "/execute",
-        json={"script": script, "hash": script_hash},
-        headers={"Authorization": f"Bearer {key_id}"},
-    )
-    exec_id = resp.json()["execution_id"]
 
-    from airlock.db import get_db
-    from airlock.api.agent import _dispatch_to_worker
-    db = await get_db()
-    await _dispatch_to_worker(
-        db, docker_client.app.state.worker_manager, exec_id, script, {}, 60
-    )
-
-    result = await docker_client.get(f"/executions/{exec_id}")
-    assert result.json()["stdout"] == "hello\n"
-
-
-async def test_execution_error(docker_client, docker_admin_token):
+async def test_execution_error(client, db, worker, admin_token):
     """A script that raises should return status=error."""
-    key_id, secret = await _create_and_lock_profile(docker_client, docker_admin_token)
-    script = 'raise ValueError("boom")'
-    script_hash = _compute_hmac(secret, script)
-
-    resp = await docker_client.post(
-        "/execute",
-        json={"script": script, "hash": script_hash},
-        headers={"Authorization": f"Bearer {key_id}"},
-    )
-    exec_id = resp.json()["execution_id"]
-
-    from airlock.db import get_db
-    from airlock.api.agent import _dispatch_to_worker
-    db = await get_db()
-    await _dispatch_to_worker(
-        db, docker_client.app.state.worker_manager, exec_id, script, {}, 60
-    )
-
-    result = await docker_client.get(f"/executions/{exec_id}")
-    body = result.json()
+    key_id, secret = await _create_and_lock_profile(client, admin_token)
+    body = await _run_script(client, db, worker, key_id, secret, 'raise ValueError("boom")')
     assert body["status"] == "error"
     assert "boom" in body["error"]
 
 
-async def test_execution_timeout(docker_client, docker_admin_token):
+async def test_execution_timeout(client, db, worker, admin_token):
     """A long-running script should be reported as timeout."""
-    key_id, secret = await _create_and_lock_profile(docker_client, docker_admin_token)
-    script = "import time; time.sleep(999)"
-    script_hash = _compute_hmac(secret, script)
-
-    resp = await docker_client.post(
-        "/execute",
-        json={"script": script, "hash": script_hash, "timeout": 2},
-        headers={"Authorization": f"Bearer {key_id}"},
-    )
-    exec_id = resp.json()["execution_id"]
-
-    from airlock.db import get_db
-    from airlock.api.agent import _dispatch_to_worker
-    db = await get_db()
-    await _dispatch_to_worker(
-        db, docker_client.app.state.worker_manager, exec_id, script, {}, 2
+    key_id, secret = await _create_and_lock_profile(client, admin_token)
+    body = await _run_script(
+        client, db, worker, key_id, secret, "import time; time.sleep(999)", timeout=2
     )
-
-    result = await docker_client.get(f"/executions/{exec_id}")
-    assert result.json()["status"] == "timeout"
+    assert body["status"] == "timeout"
 
 
 async def test_settings_access(worker):
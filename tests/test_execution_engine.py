@@ -1,11 +1,13 @@
 """Tests for the execution engine (Spec 4.1)."""
 
-import hashlib
+import asyncio
+import functools
 import hmac as hmac_mod
-from unittest.mock import AsyncMock, MagicMock
+import json
 
 import pytest
 
+from airlock.api.agent import _dispatch_to_worker
 from airlock.services.executions import (
     create_execution,
     get_execution,
@@ -14,13 +16,10 @@ from airlock.services.executions import (
 )
 
 
+@functools.lru_cache(maxsize=256)
 def _compute_hmac(secret: str, script: str) -> str:
     """Compute HMAC-SHA256 hex digest for a script."""
-    return hmac_mod.new(
-        secret.encode("utf-8"),
-        script.encode("utf-8"),
-        hashlib.sha256,
-    ).hexdigest()
+    return hmac_mod.digest(secret.encode("utf-8"), script.encode("utf-8"), "sha256").hex()
 
 
 async def _create_and_lock_profile(client, admin_token):
@@ -42,17 +41,37 @@ async def _create_and_lock_profile(client, admin_token):
     return profile_id, key_id, secret
 
 
-def _mock_worker_manager():
-    """Create a mock WorkerManager that returns completed status."""
-    mock = MagicMock()
-    mock.is_running.return_value = True
-    mock.execute = AsyncMock(return_value={
-        "status": "completed",
-        "result": {"answer": 42},
-        "stdout": "hello\n",
-        "stderr": "",
-    })
-    return mock
+@pytest.fixture
+async def prof_1(db) -> str:
+    """An unlocked profile 'prof_1' for the execution rows' foreign key."""
+    await db.execute("INSERT INTO profiles (id, description) VALUES ('prof_1', 'test')")
+    await db.commit()
+    return "prof_1"
+
+
+async def _bulk_create_executions(db, rows: list[tuple[str, str]]) -> list[str]:
+    """Insert pending executions for (profile_id, script) rows in one transaction."""
+    ids = [f"exec_{i:016x}" for i in range(len(rows))]
+    await db.executemany(
+        "INSERT INTO executions (id, profile_id, script, status) VALUES (?, ?, ?, 'pending')",
+        [(exec_id, profile_id, script) for exec_id, (profile_id, script) in zip(ids, rows)],
+    )
+    await db.commit()
+    return ids
+
+
+async def _mark_completed(db, ids: list[str], result: object = None) -> None:
+    """Move the given executions to completed with one UPDATE and one commit.
+
+    Only for the service-level status filter; HTTP tests go through update_execution.
+    """
+    placeholders = ", ".join("?" * len(ids))
+    await db.execute(
+        "UPDATE executions SET status = 'completed', result = ?, completed_at = datetime('now') "
+        f"WHERE id IN ({placeholders})",
+        (json.dumps(result) if result is not None else None, *ids),
+    )
+    await db.commit()
 
 
 # ============================================================
@@ -63,42 +82,19 @@ def _mock_worker_manager():
 class TestExecutionService:
     """Tests for the execution service CRUD functions."""
 
-    async def test_create_execution_returns_exec_id(self, app):
-        from airlock.db import get_db
-        db = await get_db()
-
-        # Need a profile for the FK constraint
-        await db.execute(
-            "INSERT INTO profiles (id, description) VALUES ('prof_1', 'test')"
-        )
-        await db.commit()
-
+    async def test_create_execution_returns_exec_id(self, db, prof_1):
         exec_id = await create_execution(db, "prof_1", "print('hello')")
         assert exec_id.startswith("exec_")
         assert len(exec_id) == 5 + 16  # "exec_" + 16 hex chars
 
-    async def test_create_execution_record_exists(self, app):
-        from airlock.db import get_db
-        db = await get_db()
-        await db.execute(
-            "INSERT INTO profiles (id, description) VALUES ('prof_1', 'test')"
-        )
-        await db.commit()
-
+    async def test_create_execution_record_exists(self, db, prof_1):
         exec_id = await create_execution(db, "prof_1", "print('hello')")
         record = await get_execution(db, exec_id)
         assert record is not None
         assert record["status"] == "pending"
         assert record["profile_id"] == "prof_1"
 
-    async def test_update_execution_completed(self, app):
-        from airlock.db import get_db
-        db = await get_db()
-        await db.execute(
-            "INSERT INTO profiles (id, description) VALUES ('prof_1', 'test')"
-        )
-        await db.commit()
-
+    async def test_update_execution_completed(self, db, prof_1):
         exec_id = await create_execution(db, "prof_1", "x = 1")
         await update_execution(
             db, exec_id, status="completed", result={"x": 1},
@@ -109,14 +105,7 @@ class TestExecutionService:
         assert record["result"] == {"x": 1}
         assert record["completed_at"] is not None
 
-    async def test_update_execution_error(self, app):
-        from airlock.db import get_db
-        db = await get_db()
-        await db.execute(
-            "INSERT INTO profiles (id, description) VALUES ('prof_1', 'test')"
-        )
-        await db.commit()
-
+    async def test_update_execution_error(self, db, prof_1):
         exec_id = await create_execution(db, "prof_1", "raise Exception")
         await update_execution(
             db, exec_id, status="error", error="Something broke",
@@ -127,34 +116,18 @@ class TestExecutionService:
         assert record["error"] == "Something broke"
         assert record["completed_at"] is not None
 
-    async def test_update_execution_running_no_completed_at(self, app):
-        from airlock.db import get_db
-        db = await get_db()
-        await db.execute(
-            "INSERT INTO profiles (id, description) VALUES ('prof_1', 'test')"
-        )
-        await db.commit()
-
+    async def test_update_execution_running_no_completed_at(self, db, prof_1):
         exec_id = await create_execution(db, "prof_1", "x = 1")
         await update_execution(db, exec_id, status="running")
         record = await get_execution(db, exec_id)
         assert record["status"] == "running"
         assert record["completed_at"] is None
 
-    async def test_get_execution_nonexistent(self, app):
-        from airlock.db import get_db
-        db = await get_db()
+    async def test_get_execution_nonexistent(self, db):
         record = await get_execution(db, "exec_nonexistent")
         assert record is None
 
-    async def test_list_executions_newest_first(self, app):
-        from airlock.db import get_db
-        db = await get_db()
-        await db.execute(
-            "INSERT INTO profiles (id, description) VALUES ('prof_1', 'test')"
-        )
-        await db.commit()
-
+    async def test_list_executions_newest_first(self, db, prof_1):
         # Insert with explicit timestamps to guarantee ordering
         await db.execute(
             """INSERT INTO executions (id, profile_id, script, status, created_at)
@@ -172,50 +145,31 @@ class TestExecutionService:
         assert records[0]["id"] == "exec_second"
         assert records[1]["id"] == "exec_first"
 
-    async def test_list_executions_filter_by_profile(self, app):
-        from airlock.db import get_db
-        db = await get_db()
-        await db.execute(
-            "INSERT INTO profiles (id, description) VALUES ('prof_1', 'test')"
-        )
+    async def test_list_executions_filter_by_profile(self, db, prof_1):
         await db.execute(
             "INSERT INTO profiles (id, description) VALUES ('prof_2', 'test2')"
         )
         await db.commit()
 
-        await create_execution(db, "prof_1", "script1")
-        await create_execution(db, "prof_2", "script2")
+        await _bulk_create_executions(db, [("prof_1", "script1"), ("prof_2", "script2")])
 
         records = await list_executions(db, profile_id="prof_1")
         assert len(records) == 1
         assert records[0]["profile_id"] == "prof_1"
 
-    async def test_list_executions_filter_by_status(self, app):
-        from airlock.db import get_db
-        db = await get_db()
-        await db.execute(
-            "INSERT INTO profiles (id, description) VALUES ('prof_1', 'test')"
+    async def test_list_executions_filter_by_status(self, db, prof_1):
+        id1, _ = await asyncio.gather(
+            create_execution(db, "prof_1", "script1"),
+            create_execution(db, "prof_1", "script2"),
         )
-        await db.commit()
-
-        id1 = await create_execution(db, "prof_1", "script1")
-        await create_execution(db, "prof_1", "script2")
-        await update_execution(db, id1, status="completed", result={"ok": True})
+        await _mark_completed(db, [id1], result={"ok": True})
 
         records = await list_executions(db, status="completed")
         assert len(records) == 1
         assert records[0]["status"] == "completed"
 
-    async def test_list_executions_pagination(self, app):
-        from airlock.db import get_db
-        db = await get_db()
-        await db.execute(
-            "INSERT INTO profiles (id, description) VALUES ('prof_1', 'test')"
-        )
-        await db.commit()
-
-        for i in range(5):
-            await create_execution(db, "prof_1", f"script{i}")
+    async def test_list_executions_pagination(self, db, prof_1):
+        await _bulk_create_executions(db, [("prof_1", f"script{i}") for i in range(5)])
 
         page1 = await list_executions(db, limit=2, offset=0)
         page2 = await list_executions(db, limit=2, offset=2)
@@ -225,9 +179,7 @@ class TestExecutionService:
         assert len(page2) == 2
         assert len(page3) == 1
 
-    async def test_list_executions_empty_db(self, app):
-        from airlock.db import get_db
-        db = await get_db()
+    async def test_list_executions_empty_db(self, db):
         records = await list_executions(db)
         assert records == []
 
@@ -240,9 +192,9 @@ class TestExecutionService:
 class TestExecuteEndpointMockWorker:
     """Tests for POST /execute with a mocked WorkerManager."""
 
-    async def test_execute_returns_202(self, app, client, admin_token):
-        app.state.worker_manager = _mock_worker_manager()
-        profile_id, key_id, secret = await _create_and_lock_profile(client, admin_token)
+    async def test_execute_returns_202(self, app, client, locked_profile, mock_worker):
+        app.state.worker_manager = mock_worker
+        profile_id, key_id, secret = locked_profile
         script = "print('hello')"
         script_hash = _compute_hmac(secret, script)
 
@@ -256,9 +208,9 @@ class TestExecuteEndpointMockWorker:
         assert data["execution_id"].startswith("exec_")
         assert data["status"] == "pending"
 
-    async def test_execute_poll_url_is_full_url(self, app, client, admin_token):
-        app.state.worker_manager = _mock_worker_manager()
-        _, key_id, secret = await _create_and_lock_profile(client, admin_token)
+    async def test_execute_poll_url_is_full_url(self, app, client, locked_profile, mock_worker):
+        app.state.worker_manager = mock_worker
+        _, key_id, secret = locked_profile
         script = "x = 1"
         script_hash = _compute_hmac(secret, script)
 
@@ -271,9 +223,11 @@ class TestExecuteEndpointMockWorker:
         assert data["poll_url"].startswith("http")
         assert "/executions/" in data["poll_url"]
 
-    async def test_execute_creates_sqlite_record(self, app, client, admin_token):
-        app.state.worker_manager = _mock_worker_manager()
-        _, key_id, secret = await _create_and_lock_profile(client, admin_token)
+    async def test_execute_creates_sqlite_record(
+        self, app, client, db, locked_profile, mock_worker
+    ):
+        app.state.worker_manager = mock_worker
+        _, key_id, secret = locked_profile
         script = "x = 1"
         script_hash = _compute_hmac(secret, script)
 
@@ -284,8 +238,6 @@ class TestExecuteEndpointMockWorker:
         )
         exec_id = resp.json()["execution_id"]
 
-        from airlock.db import get_db
-        db = await get_db()
         record = await get_execution(db, exec_id)
         assert record is not None
 
@@ -296,9 +248,9 @@ class TestExecuteEndpointMockWorker:
         )
         assert resp.status_code == 401
 
-    async def test_execute_wrong_hmac(self, app, client, admin_token):
-        app.state.worker_manager = _mock_worker_manager()
-        _, key_id, secret = await _create_and_lock_profile(client, admin_token)
+    async def test_execute_wrong_hmac(self, app, client, locked_profile, mock_worker):
+        app.state.worker_manager = mock_worker
+        _, key_id, secret = locked_profile
 
         resp = await client.post(
             "/execute",
@@ -307,10 +259,17 @@ class TestExecuteEndpointMockWorker:
         )
         assert resp.status_code == 403
 
-    async def test_execute_worker_unavailable(self, app, client, admin_token):
-        # Worker is None (not started)
-        app.state.worker_manager = None
-        _, key_id, secret = await _create_and_lock_profile(client, admin_token)
+    @pytest.mark.parametrize("started", [False, True], ids=["not_started", "not_running"])
+    async def test_execute_worker_unavailable(
+        self, app, client, locked_profile, mock_worker, started
+    ):
+        # Worker is None (never started), or present but its container is down
+        if started:
+            mock_worker.is_running.return_value = False
+            app.state.worker_manager = mock_worker
+        else:
+            app.state.worker_manager = None
+        _, key_id, secret = locked_profile
         script = "x = 1"
         script_hash = _compute_hmac(secret, script)
 
@@ -322,26 +281,10 @@ class TestExecuteEndpointMockWorker:
         assert resp.status_code == 503
         assert "not available" in resp.json()["detail"]
 
-    async def test_execute_worker_not_running(self, app, client, admin_token):
-        mock = MagicMock()
-        mock.is_running.return_value = False
-        app.state.worker_manager = mock
-        _, key_id, secret = await _create_and_lock_profile(client, admin_token)
-        script = "x = 1"
-        script_hash = _compute_hmac(secret, script)
-
-        resp = await client.post(
-            "/execute",
-            json={"script": script, "hash": script_hash},
-            headers={"Authorization": f"Bearer {key_id}"},
-        )
-        assert resp.status_code == 503
-
-    async def test_poll_after_completion(self, app, client, admin_token):
+    async def test_poll_after_completion(self, app, client, db, locked_profile, mock_worker):
         """After worker completes, GET /executions/{id} returns the result."""
-        mock_worker = _mock_worker_manager()
         app.state.worker_manager = mock_worker
-        profile_id, key_id, secret = await _create_and_lock_profile(client, admin_token)
+        profile_id, key_id, secret = locked_profile
         script = "x = 42"
         script_hash = _compute_hmac(secret, script)
 
@@ -354,9 +297,6 @@ class TestExecuteEndpointMockWorker:
         exec_id = resp.json()["execution_id"]
 
         # Manually run the background task (TestClient doesn't run background tasks automatically)
-        from airlock.db import get_db
-        from airlock.api.agent import _dispatch_to_worker
-        db = await get_db()
         settings = {}
         await _dispatch_to_worker(db, mock_worker, exec_id, script, settings, 60)
 
@@ -378,20 +318,10 @@ class TestExecuteEndpointMockWorker:
 class TestExecutionHistory:
     """Tests for execution history endpoints."""
 
-    async def test_agent_list_executions(self, app, client, admin_token):
+    async def test_agent_list_executions(self, client, db, locked_profile):
         """GET /executions returns summary list for authenticated profile."""
-        mock_worker = _mock_worker_manager()
-        app.state.worker_manager = mock_worker
-        profile_id, key_id, secret = await _create_and_lock_profile(client, admin_token)
-
-        # Create an execution
-        script = "x = 1"
-        script_hash = _compute_hmac(secret, script)
-        await client.post(
-            "/execute",
-            json={"script": script, "hash": script_hash},
-            headers={"Authorization": f"Bearer {key_id}"},
-        )
+        profile_id, key_id, _ = locked_profile
+        await create_execution(db, profile_id, "x = 1")
 
         # List
         resp = await client.get(
@@ -406,25 +336,10 @@ class TestExecutionHistory:
         # Summary should NOT include result/stdout/stderr
         assert "result" not in data["executions"][0]
 
-    async def test_agent_list_executions_status_filter(self, app, client, admin_token):
-        mock_worker = _mock_worker_manager()
-        app.state.worker_manager = mock_worker
-        profile_id, key_id, secret = await _create_and_lock_profile(client, admin_token)
-
-        script = "x = 1"
-        script_hash = _compute_hmac(secret, script)
-        resp = await client.post(
-            "/execute",
-            json={"script": script, "hash": script_hash},
-            headers={"Authorization": f"Bearer {key_id}"},
-        )
-        exec_id = resp.json()["execution_id"]
-
-        # Run the worker task to set status to completed
-        from airlock.db import get_db
-        from airlock.api.agent import _dispatch_to_worker
-        db = await get_db()
-        await _dispatch_to_worker(db, mock_worker, exec_id, script, {}, 60)
+    async def test_agent_list_executions_status_filter(self, client, db, locked_profile):
+        profile_id, key_id, _ = locked_profile
+        exec_id = await create_execution(db, profile_id, "x = 1")
+        await update_execution(db, exec_id, status="completed", result={"answer": 42})
 
         # Filter by completed
         resp = await client.get(
@@ -442,23 +357,17 @@ class TestExecutionHistory:
         assert resp.status_code == 200
         assert len(resp.json()["executions"]) == 0
 
-    async def test_agent_list_excludes_other_profiles(self, app, client, admin_token):
+    async def test_agent_list_excludes_other_profiles(self, client, db, admin_token):
         """Agents should only see their own profile's executions."""
-        mock_worker = _mock_worker_manager()
-        app.state.worker_manager = mock_worker
-
         # Create two profiles
-        _, key_id_1, secret_1 = await _create_and_lock_profile(client, admin_token)
-        _, key_id_2, secret_2 = await _create_and_lock_profile(client, admin_token)
-
-        # Execute under profile 1
-        script = "x = 1"
-        await client.post(
-            "/execute",
-            json={"script": script, "hash": _compute_hmac(secret_1, script)},
-            headers={"Authorization": f"Bearer {key_id_1}"},
+        (profile_id_1, _, _), (_, key_id_2, _) = await asyncio.gather(
+            _create_and_lock_profile(client, admin_token),
+            _create_and_lock_profile(client, admin_token),
         )
 
+        # Execution under profile 1
+        await create_execution(db, profile_id_1, "x = 1")
+
         # List from profile 2 — should be empty
         resp = await client.get(
             "/executions",
@@ -467,23 +376,14 @@ class TestExecutionHistory:
         assert resp.status_code == 200
         assert len(resp.json()["executions"]) == 0
 
-    async def test_admin_list_executions(self, app, client, admin_token):
+    async def test_admin_list_executions(self, client, db, admin_headers, locked_profile):
         """Admin can see all executions with full details."""
-        mock_worker = _mock_worker_manager()
-        app.state.worker_manager = mock_worker
-        profile_id, key_id, secret = await _create_and_lock_profile(client, admin_token)
-
-        script = "x = 1"
-        script_hash = _compute_hmac(secret, script)
-        await client.post(
-            "/execute",
-            json={"script": script, "hash": script_hash},
-            headers={"Authorization": f"Bearer {key_id}"},
-        )
+        profile_id, _, _ = locked_profile
+        await create_execution(db, profile_id, "x = 1")
 
         resp = await client.get(
             "/api/admin/executions",
-            headers={"Authorization": f"Bearer {admin_token}"},
+            headers=admin_headers,
         )
         assert resp.status_code == 200
         data = resp.json()
@@ -492,22 +392,15 @@ class TestExecutionHistory:
         assert "profile_id" in data["executions"][0]
         assert "result" in data["executions"][0]
 
-    async def test_admin_list_executions_filter_by_profile(self, app, client, admin_token):
-        mock_worker = _mock_worker_manager()
-        app.state.worker_manager = mock_worker
-        profile_id, key_id, secret = await _create_and_lock_profile(client, admin_token)
-
-        script = "x = 1"
-        script_hash = _compute_hmac(secret, script)
-        await client.post(
-            "/execute",
-            json={"script": script, "hash": script_hash},
-            headers={"Authorization": f"Bearer {key_id}"},
-        )
+    async def test_admin_list_executions_filter_by_profile(
+        self, client, db, admin_headers, locked_profile
+    ):
+        profile_id, _, _ = locked_profile
+        await create_execution(db, profile_id, "x = 1")
 
         resp = await client.get(
             f"/api/admin/executions?profile_id={profile_id}",
-            headers={"Authorization": f"Bearer {admin_token}"},
+            headers=admin_headers,
         )
         assert resp.status_code == 200
         assert len(resp.json()["executions"]) == 1
@@ -515,47 +408,39 @@ class TestExecutionHistory:
         # Filter by nonexistent profile
         resp = await client.get(
             "/api/admin/executions?profile_id=nonexistent",
-            headers={"Authorization": f"Bearer {admin_token}"},
+            headers=admin_headers,
         )
         assert resp.status_code == 200
         assert len(resp.json()["executions"]) == 0
 
-    async def test_admin_get_execution_includes_script(self, app, client, admin_token):
-        mock_worker = _mock_worker_manager()
-        app.state.worker_manager = mock_worker
-        _, key_id, secret = await _create_and_lock_profile(client, admin_token)
-
-        script = "x = 42"
-        script_hash = _compute_hmac(secret, script)
-        resp = await client.post(
-            "/execute",
-            json={"script": script, "hash": script_hash},
-            headers={"Authorization": f"Bearer {key_id}"},
-        )
-        exec_id = resp.json()["execution_id"]
+    async def test_admin_get_execution_includes_script(
+        self, client, db, admin_headers, locked_profile
+    ):
+        profile_id, _, _ = locked_profile
+        exec_id = await create_execution(db, profile_id, "x = 42")
 
         resp = await client.get(
             f"/api/admin/executions/{exec_id}",
-            headers={"Authorization": f"Bearer {admin_token}"},
+            headers=admin_headers,
         )
         assert resp.status_code == 200
         data = resp.json()
         assert data["script"] == "x = 42"
         assert data["execution_id"] == exec_id
 
-    async def test_admin_get_execution_not_found(self, app, client, admin_token):
+    async def test_admin_get_execution_not_found(self, app, client, admin_headers):
         resp = await client.get(
             "/api/admin/executions/exec_nonexistent",
-            headers={"Authorization": f"Bearer {admin_token}"},
+            headers=admin_headers,
         )
         assert resp.status_code == 404
 
     async def test_admin_endpoints_require_auth(self, client):
-        resp = await client.get("/api/admin/executions")
-        assert resp.status_code == 401
-
-        resp = await client.get("/api/admin/executions/exec_123")
-        assert resp.status_code == 401
+        responses = await asyncio.gather(
+            client.get("/api/admin/executions"),
+            client.get("/api/admin/executions/exec_123"),
+        )
+        assert [r.status_code for r in responses] == [401, 401]
 
 
 # ============================================================
@@ -566,9 +451,9 @@ class TestExecutionHistory:
 class TestPollUrl:
     """Tests for poll_url behavior."""
 
-    async def test_poll_url_is_valid_full_url(self, app, client, admin_token):
-        app.state.worker_manager = _mock_worker_manager()
-        _, key_id, secret = await _create_and_lock_profile(client, admin_token)
+    async def test_poll_url_is_valid_full_url(self, app, client, locked_profile, mock_worker):
+        app.state.worker_manager = mock_worker
+        _, key_id, secret = locked_profile
         script = "x = 1"
         script_hash = _compute_hmac(secret, script)
 
@@ -581,9 +466,11 @@ class TestPollUrl:
         assert poll_url.startswith("http")
         assert "/executions/" in poll_url
 
-    async def test_poll_url_returns_execution_status(self, app, client, admin_token):
-        app.state.worker_manager = _mock_worker_manager()
-        _, key_id, secret = await _create_and_lock_profile(client, admin_token)
+    async def test_poll_url_returns_execution_status(
+        self, app, client, locked_profile, mock_worker
+    ):
+        app.state.worker_manager = mock_worker
+        _, key_id, secret = locked_profile
         script = "x = 1"
         script_hash = _compute_hmac(secret, script)
 
@@ -595,16 +482,18 @@ class TestPollUrl:
         poll_url = resp.json()["poll_url"]
         exec_id = resp.json()["execution_id"]
 
-        # Extract relative path from poll_url
-        from urllib.parse import urlparse
-        path = urlparse(poll_url).path
+        # Strip the test client's base URL to get the relative path
+        path = poll_url.removeprefix("http://test")
+        assert path == f"/executions/{exec_id}"
         poll_resp = await client.get(path)
         assert poll_resp.status_code == 200
         assert poll_resp.json()["execution_id"] == exec_id
 
-    async def test_poll_url_matches_execution_pattern(self, app, client, admin_token):
-        app.state.worker_manager = _mock_worker_manager()
-        _, key_id, secret = await _create_and_lock_profile(client, admin_token)
+    async def test_poll_url_matches_execution_pattern(
+        self, app, client, locked_profile, mock_worker
+    ):
+        app.state.worker_manager = mock_worker
+        _, key_id, secret = locked_profile
         script = "x = 1"
         script_hash = _compute_hmac(secret, script)
 